@@ -2,28 +2,30 @@
 """Batch image quantification utility.
 
 This script replicates the behaviour of the original Fiji macro by reading a
-list of image paths, converting each image to 32-bit grayscale, computing basic
-measurements (area and integrated density), and writing the results to a CSV
-file.  It can be executed on any platform with Python 3.9+ and the required
-libraries installed.
+list of image paths, converting each image to grayscale, computing basic
+measurements (area, mean gray value and integrated density), and writing the
+results to a CSV file.  It can be executed on any platform with Python 3.9+ and
+the required libraries installed.
 """
 from __future__ import annotations
 
 import argparse
 import csv
+import os
 import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from itertools import chain
 from pathlib import Path
-from typing import Iterable, List, Sequence
-
-import numpy as np
-from PIL import Image, ImageOps
+from typing import Deque, Iterable, Iterator, List, Sequence
 
 
 def parse_args(argv: Sequence[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description=(
-            "Quantify a batch of images by computing area and integrated density "
-            "after converting to 32-bit grayscale."
+            "Quantify a batch of images by computing area, mean gray value and "
+            "integrated density after converting to grayscale."
         )
     )
     parser.add_argument(
@@ -46,7 +48,51 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
         metavar="N",
         help="Number of decimal places to include in the output (default: 3).",
     )
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--workers",
+        "--jobs",
+        type=int,
+        default=min(32, (os.cpu_count() or 1) + 4),
+        metavar="N",
+        help=(
+            "Number of images to quantify in parallel (default: the number of "
+            "CPUs plus 4, at most 32). Use 1 to process images one at a time."
+        ),
+    )
+    parser.add_argument(
+        "--threshold",
+        type=int,
+        default=None,
+        metavar="N",
+        help=(
+            "Only measure pixels with a gray value of at least N (0-255), like "
+            "ImageJ's 'Limit to threshold'. By default the whole image is measured."
+        ),
+    )
+    parser.add_argument(
+        "--downscale",
+        type=int,
+        default=1,
+        metavar="N",
+        help=(
+            "Decode JPEG images at roughly 1/N of their width and height and "
+            "scale Area and IntDen back up to the full image. Much faster for "
+            "large JPEGs but approximate; other formats are unaffected "
+            "(default: 1, exact). Cannot be combined with --threshold."
+        ),
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.threshold is not None and not 0 <= args.threshold <= 255:
+        parser.error("--threshold must be between 0 and 255")
+    if args.downscale < 1:
+        parser.error("--downscale must be at least 1")
+    if args.downscale > 1 and args.threshold is not None:
+        # Downscaled decoding averages neighbouring pixels, which changes how
+        # many of them clear the threshold rather than just approximating it.
+        parser.error("--threshold cannot be combined with --downscale")
+    return args
 
 
 def read_image_paths(list_file: Path) -> Iterable[Path]:
@@ -65,41 +111,150 @@ def read_image_paths(list_file: Path) -> Iterable[Path]:
             yield candidate
 
 
-def quantify_image(image_path: Path) -> tuple[float, float]:
+def quantify_image(
+    image_path: Path, threshold: int | None = None, downscale: int = 1
+) -> tuple[float, int | float]:
+    # Imported on first use so that --help and argument errors do not pay for
+    # loading NumPy and Pillow.
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    from PIL import Image, ImageOps  # pylint: disable=import-outside-toplevel
+
     try:
         with Image.open(image_path) as image:
-            # Convert to grayscale and ensure 32-bit floating point precision.
-            grayscale = ImageOps.grayscale(image)
-            grayscale_array = np.array(grayscale, dtype=np.float32)
+            full_area = image.width * image.height
+            if downscale > 1:
+                # Lets libjpeg decode straight to a smaller grayscale image;
+                # formats without draft support ignore it and decode as usual.
+                target_size = (
+                    max(1, image.width // downscale),
+                    max(1, image.height // downscale),
+                )
+                image.draft("L", target_size)
+            # Pillow's grayscale conversion clips 16-bit and float images to
+            # 8 bits, which would silently distort their measurements.
+            if image.mode in ("I", "F") or image.mode.startswith("I;"):
+                raise RuntimeError(
+                    f"Unsupported image mode {image.mode} in {image_path}: only"
+                    " 8-bit grayscale and color images can be measured; use the"
+                    " Fiji wrapper for 16-bit or 32-bit images"
+                )
+            # 8-bit grayscale images need no conversion; converting them would
+            # only copy the decoded image.
+            grayscale = image if image.mode == "L" else ImageOps.grayscale(image)
+            # Keep the 8-bit pixels as they are; the sum below uses a 64-bit
+            # integer accumulator, which is exact without a float copy.
+            grayscale_array = np.asarray(grayscale)
+    except FileNotFoundError:
+        raise
     except OSError as exc:
         raise RuntimeError(f"Failed to open {image_path}: {exc}") from exc
 
-    area = float(grayscale_array.shape[0] * grayscale_array.shape[1])
-    integrated_density = float(grayscale_array.sum())
+    if threshold is None:
+        area = float(grayscale_array.size)
+        integrated_density = grayscale_array.sum(dtype=np.uint64).item()
+    else:
+        # A histogram of the 8-bit values yields both the pixel count and the
+        # sum at or above the threshold from a single pass over the image.
+        histogram = np.bincount(grayscale_array.ravel(), minlength=256)[threshold:]
+        area = float(histogram.sum())
+        integrated_density = (histogram @ np.arange(threshold, 256)).item()
+
+    if grayscale_array.size != full_area:
+        # Each decoded pixel of a downscaled image stands for several originals.
+        scale = full_area / grayscale_array.size
+        area *= scale
+        integrated_density *= scale
     return area, integrated_density
 
 
+def _try_quantify_image(
+    image_path: Path, threshold: int | None, downscale: int
+) -> tuple[float, int | float] | Exception:
+    try:
+        return quantify_image(image_path, threshold, downscale)
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        return exc
+
+
+def quantify_images(
+    image_paths: Sequence[Path],
+    workers: int,
+    threshold: int | None = None,
+    downscale: int = 1,
+) -> Iterator[tuple[Path, tuple[float, int | float] | Exception]]:
+    """Yield each path with its measurements, or the error it raised, in order."""
+    if workers == 1 or len(image_paths) <= 1:
+        # A pool would only add thread start-up for no overlap.
+        for image_path in image_paths:
+            yield image_path, _try_quantify_image(image_path, threshold, downscale)
+        return
+
+    # Pillow's decoders and NumPy's reductions release the GIL, so threads keep
+    # every core busy without re-importing both libraries in child processes.
+    workers = min(workers, len(image_paths))
+    quantify = partial(_try_quantify_image, threshold=threshold, downscale=downscale)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Keep only a small window of images in flight: the workers stay busy
+        # while the caller writes rows, but never run far ahead of it.
+        pending: Deque[tuple[Path, Future]] = deque()
+        for image_path in image_paths:
+            if len(pending) >= 2 * workers:
+                done_path, future = pending.popleft()
+                yield done_path, future.result()
+            pending.append((image_path, executor.submit(quantify, image_path)))
+        while pending:
+            done_path, future = pending.popleft()
+            yield done_path, future.result()
+
+
+def _successful_rows(
+    outcomes: Iterable[tuple[Path, tuple[float, int | float] | Exception]],
+    skipped: List[str],
+) -> Iterator[tuple[str, float, int | float]]:
+    """Yield a result row per measured image, recording failures in ``skipped``."""
+    for image_path, outcome in outcomes:
+        if isinstance(outcome, FileNotFoundError):
+            skipped.append(str(image_path))
+            continue
+        if isinstance(outcome, Exception):
+            skipped.append(f"{image_path} (error: {outcome})")
+            continue
+
+        area, integrated_density = outcome
+        yield str(image_path), area, integrated_density
+
+
 def write_results(
-    rows: Iterable[tuple[str, float, float]],
+    rows: Iterable[tuple[str, float, int | float]],
     output_csv: Path,
     decimal_places: int,
-) -> None:
+) -> int:
+    """Write ``rows`` to ``output_csv`` as they arrive and return how many.
+
+    The file is only created once the first row is available, so an existing
+    ``output_csv`` is left untouched when there is nothing to write.
+    """
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is None:
+        return 0
+
     output_csv.parent.mkdir(parents=True, exist_ok=True)
-    fieldnames = ["Image", "Area", "IntDen"]
+    fieldnames = ["Image", "Area", "Mean", "IntDen"]
 
-    fmt = f"{{:.{decimal_places}f}}"
+    fmt = f"{{:.{decimal_places}f}}".format
 
+    count = 0
     with output_csv.open("w", newline="", encoding="utf-8") as handle:
-        writer = csv.DictWriter(handle, fieldnames=fieldnames)
-        writer.writeheader()
-        for image_name, area, intden in rows:
-            writer.writerow(
-                {
-                    "Image": image_name,
-                    "Area": fmt.format(area),
-                    "IntDen": fmt.format(intden),
-                }
-            )
+        writer = csv.writer(handle)
+        writer.writerow(fieldnames)
+        for image_name, area, intden in chain((first_row,), rows):
+            count += 1
+            # Like Fiji's Mean, derived from the sum rather than a second pass
+            # over the pixels.
+            mean = intden / area if area else float("nan")
+            writer.writerow((image_name, fmt(area), fmt(mean), fmt(intden)))
+    return count
 
 
 def main(argv: Sequence[str] | None = None) -> int:
@@ -115,34 +270,26 @@ def main(argv: Sequence[str] | None = None) -> int:
         print("The provided list file does not contain any image paths.", file=sys.stderr)
         return 1
 
-    results: List[tuple[str, float, float]] = []
     skipped: List[str] = []
 
-    for image_path in image_paths:
-        if not image_path.exists():
-            skipped.append(str(image_path))
-            continue
-
-        try:
-            area, integrated_density = quantify_image(image_path)
-        except Exception as exc:  # pylint: disable=broad-exception-caught
-            skipped.append(f"{image_path} (error: {exc})")
-            continue
-
-        results.append((str(image_path), area, integrated_density))
+    # Rows are written as soon as each image is measured, so nothing but the
+    # list of skipped images accumulates over the batch.
+    outcomes = quantify_images(
+        image_paths, args.workers, args.threshold, args.downscale
+    )
+    rows = _successful_rows(outcomes, skipped)
+    try:
+        written = write_results(rows, args.output_csv, args.decimal_places)
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        print(f"Failed to write output CSV: {exc}", file=sys.stderr)
+        return 1
 
-    if not results:
+    if not written:
         print("No images were processed successfully.", file=sys.stderr)
         for entry in skipped:
             print(f"Skipped: {entry}", file=sys.stderr)
         return 1
 
-    try:
-        write_results(results, args.output_csv, args.decimal_places)
-    except Exception as exc:  # pylint: disable=broad-exception-caught
-        print(f"Failed to write output CSV: {exc}", file=sys.stderr)
-        return 1
-
     print(f"Saved results to: {args.output_csv}")
 
     if skipped:
@@ -2,11 +2,11 @@
 set -euo pipefail
 
 usage() {
-  echo "Usage: $0 <fiji_executable> <list_file> <output_results_file>" >&2
+  echo "Usage: $0 <fiji_executable> <list_file> <output_results_file> [num_workers]" >&2
   exit 1
 }
 
-if [ "$#" -ne 3 ]; then
+if [ "$#" -lt 3 ] || [ "$#" -gt 4 ]; then
   usage
 fi
 
@@ -14,6 +14,17 @@ FIJI_EXEC="$1"
 LIST_FILE="$2"
 OUTPUT_FILE="$3"
 
+# Each Fiji JVM runs its own thread pool and needs several GB of heap, so by
+# default only start one worker per two cores.
+if [ "$#" -eq 4 ]; then
+  NUM_WORKERS="$4"
+else
+  NUM_WORKERS=$(( $(getconf _NPROCESSORS_ONLN 2>/dev/null || echo 2) / 2 ))
+  if [ "$NUM_WORKERS" -lt 1 ]; then
+    NUM_WORKERS=1
+  fi
+fi
+
 if [ ! -x "$FIJI_EXEC" ]; then
   echo "Error: Fiji executable '$FIJI_EXEC' not found or not executable." >&2
   exit 1
@@ -24,6 +35,20 @@ if [ ! -f "$LIST_FILE" ]; then
   exit 1
 fi
 
+case "$NUM_WORKERS" in
+  '' | *[!0-9]*)
+    echo "Error: Number of workers must be a positive integer, got '$NUM_WORKERS'." >&2
+    exit 1
+    ;;
+esac
+
+# Force base 10 so that a value such as 08 is not read as octal.
+NUM_WORKERS=$((10#$NUM_WORKERS))
+if [ "$NUM_WORKERS" -eq 0 ]; then
+  echo "Error: Number of workers must be a positive integer, got '$4'." >&2
+  exit 1
+fi
+
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 REPO_ROOT="$(cd "$SCRIPT_DIR/.." && pwd)"
 MACRO_PATH="$REPO_ROOT/macros/batch_area_measurement.ijm"
@@ -33,5 +58,87 @@ if [ ! -f "$MACRO_PATH" ]; then
   exit 1
 fi
 
-ARGS=$'list='"$LIST_FILE"$'\noutput='"$OUTPUT_FILE"
-"$FIJI_EXEC" --headless -macro "$MACRO_PATH" "$ARGS"
+IMAGE_COUNT="$(awk 'NF { n++ } END { print n + 0 }' "$LIST_FILE")"
+if [ "$IMAGE_COUNT" -eq 0 ]; then
+  echo "Error: List file '$LIST_FILE' does not contain any image paths." >&2
+  exit 1
+fi
+
+if [ "$NUM_WORKERS" -gt "$IMAGE_COUNT" ]; then
+  NUM_WORKERS="$IMAGE_COUNT"
+fi
+
+# A single worker needs no chunking or merging; hand the list straight to Fiji.
+if [ "$NUM_WORKERS" -eq 1 ]; then
+  ARGS=$'list='"$LIST_FILE"$'\noutput='"$OUTPUT_FILE"
+  exec "$FIJI_EXEC" --headless -macro "$MACRO_PATH" "$ARGS"
+fi
+
+WORK_DIR="$(mktemp -d "${TMPDIR:-/tmp}/batch-quant.XXXXXX")"
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+# Split the list into contiguous chunks so that concatenating the per-worker
+# results preserves the order of the original list.
+CHUNK_SIZE=$(( (IMAGE_COUNT + NUM_WORKERS - 1) / NUM_WORKERS ))
+NUM_CHUNKS=$(( (IMAGE_COUNT + CHUNK_SIZE - 1) / CHUNK_SIZE ))
+awk -v size="$CHUNK_SIZE" -v dir="$WORK_DIR" \
+  'NF { print > (dir "/chunk-" int(n / size) ".txt"); n++ }' "$LIST_FILE"
+
+PIDS=()
+for ((i = 0; i < NUM_CHUNKS; i++)); do
+  ARGS=$'list='"$WORK_DIR/chunk-$i.txt"$'\noutput='"$WORK_DIR/results-$i.csv"
+  # Relay each worker's log line by line as it arrives, tagged with the worker
+  # number, so concurrent output stays readable without buffering it.
+  (
+    "$FIJI_EXEC" --headless -macro "$MACRO_PATH" "$ARGS" 2>&1 |
+      while IFS= read -r line || [ -n "$line" ]; do
+        printf '[worker %d] %s\n' "$i" "$line"
+      done
+  ) &
+  PIDS+=("$!")
+done
+
+FAILED=0
+for pid in "${PIDS[@]}"; do
+  if ! wait "$pid"; then
+    FAILED=$((FAILED + 1))
+  fi
+done
+
+if [ "$FAILED" -ne 0 ]; then
+  echo "Error: $FAILED of $NUM_CHUNKS Fiji worker(s) failed." >&2
+  exit 1
+fi
+
+# The macro only moves its ".part" file to the results path after its last
+# image, so a missing results file means that worker's Fiji stopped early,
+# even if it exited with status 0.
+RESULT_FILES=()
+for ((i = 0; i < NUM_CHUNKS; i++)); do
+  if [ ! -f "$WORK_DIR/results-$i.csv" ]; then
+    echo "Error: Fiji worker $i did not finish; these images may not have been measured:" >&2
+    sed 's/^/  /' "$WORK_DIR/chunk-$i.txt" >&2
+    exit 1
+  fi
+  RESULT_FILES+=("$WORK_DIR/results-$i.csv")
+done
+
+# Keep the header of the first file only and renumber Fiji's leading row-index
+# column so that the merged table reads like a single Results window.
+awk '
+  FNR == 1 {
+    if (NR == 1) {
+      print
+      renumber = ($0 ~ /^ ,/)
+    }
+    next
+  }
+  {
+    if (renumber) {
+      sub(/^[^,]*/, ++row)
+    }
+    print
+  }
+' "${RESULT_FILES[@]}" > "$OUTPUT_FILE"
+
+echo "Saved results to: $OUTPUT_FILE"